@@ -0,0 +1,338 @@
+"""
+Shared core for the Chronology console game.
+
+Holds the Song model, the dataset loaders (xlsx streaming, CSV, parquet
+cache) and the game mechanics used by both entry scripts, so an
+optimization or fix lands once and benefits every front-end.
+"""
+
+from __future__ import annotations
+import os
+import random
+import sys
+from operator import attrgetter
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List, Optional, Set
+
+# pandas and openpyxl cost hundreds of ms to import; the loaders pull them in
+# lazily so importing this module (and e.g. --help) stays instant.
+if TYPE_CHECKING:
+    import pandas as pd
+
+# ---------------- Config ----------------
+MAX_LIVES = 3
+REQUIRED_COLS = ["track_id", "track_name", "track_artist", "year", "track_url"]
+OPTIONAL_COLS = ["track_popularity", "track_cover"]
+
+# ---------------- Data model ----------------
+@dataclass(frozen=True, slots=True)
+class Song:
+    track_id: int | str
+    track_name: str
+    track_artist: str
+    year: int
+    track_url: str | None = None
+    popularity: Optional[int] = None
+    track_cover: Optional[str] = None
+
+    def label(self, show_year: bool = False) -> str:
+        base = f"{self.track_name} — {self.track_artist}"
+        return f"{base} ({self.year})" if show_year else base
+
+# ---------------- Loading ----------------
+_CSV_DTYPES = {
+    "track_id": "string",
+    "track_name": "string",
+    "track_artist": "string",
+    # Nullable Int64: blank cells are normal input and must parse as NA,
+    # not crash the reader (plain int64 cannot hold missing values).
+    "year": "Int64",
+    "track_url": "string",
+    "track_popularity": "Int64",
+    "track_cover": "string",
+}
+
+
+def _read_csv(path: str) -> pd.DataFrame:
+    """
+    Read a songs CSV, projecting to the columns we actually use.
+
+    Probing the header first lets us pass usecols + explicit dtypes to the
+    parser, so wide files don't pay to parse columns we'd drop anyway and
+    pandas skips its type-inference pass. Uses the pyarrow engine when it's
+    installed, falling back to the default engine otherwise.
+    """
+    import pandas as pd
+
+    header = list(pd.read_csv(path, nrows=0).columns)
+    wanted = set(REQUIRED_COLS + OPTIONAL_COLS)
+    usecols = [c for c in header if str(c).lower() in wanted]
+    lowered = {str(c).lower() for c in usecols}
+    missing = [c for c in REQUIRED_COLS if c not in lowered]
+    if missing:
+        raise SystemExit(f"Dataset missing columns: {missing}. Required: {REQUIRED_COLS}")
+    dtypes = {c: _CSV_DTYPES[str(c).lower()] for c in usecols if str(c).lower() in _CSV_DTYPES}
+    try:
+        return pd.read_csv(path, usecols=usecols, dtype=dtypes, engine="pyarrow")
+    except (ImportError, ValueError):
+        pass  # engine missing, or its stricter casting rejected the data
+    try:
+        return pd.read_csv(path, usecols=usecols, dtype=dtypes)
+    except ValueError:
+        # junk in a numeric column: read untyped, _clean_songs_df coerces
+        return pd.read_csv(path, usecols=usecols)
+
+
+def _column_or_none(df: pd.DataFrame, col: str) -> list:
+    """Pull a column as a plain Python list with missing values as None."""
+    if col not in df.columns:
+        return [None] * len(df)
+    return df[col].astype(object).where(df[col].notna(), None).tolist()
+
+
+def _cell(row: tuple, idx: Optional[int]):
+    """Safe cell access: read-only rows can be shorter than the header."""
+    if idx is None or idx >= len(row):
+        return None
+    return row[idx]
+
+
+def _load_songs_xlsx(path: str) -> List[Song]:
+    """
+    Stream songs straight out of an .xlsx file.
+
+    read_only mode parses the sheet as a stream instead of building the full
+    workbook DOM, so memory stays flat and large sheets load much faster than
+    going through pd.read_excel.
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            raise SystemExit("No valid songs found.")
+
+        col_idx = {str(c).lower(): i for i, c in enumerate(header) if c is not None}
+        missing = [c for c in REQUIRED_COLS if c not in col_idx]
+        if missing:
+            raise SystemExit(f"Dataset missing columns: {missing}. Required: {REQUIRED_COLS}")
+
+        idx_id = col_idx["track_id"]
+        idx_name = col_idx["track_name"]
+        idx_artist = col_idx["track_artist"]
+        idx_year = col_idx["year"]
+        idx_url = col_idx["track_url"]
+        idx_pop = col_idx.get("track_popularity")
+        idx_cover = col_idx.get("track_cover")
+
+        songs: List[Song] = []
+        seen: Set[tuple] = set()
+        for row in rows:
+            try:
+                year = int(_cell(row, idx_year))
+            except (TypeError, ValueError):
+                continue  # missing or non-numeric year: skip the row
+            name = _cell(row, idx_name)
+            artist = _cell(row, idx_artist)
+            if name is None or artist is None:
+                continue
+            track_id = _cell(row, idx_id)
+            if (track_id, year) in seen:
+                continue
+            seen.add((track_id, year))
+            if isinstance(track_id, str):
+                track_id = sys.intern(track_id)
+
+            url = _cell(row, idx_url)
+            pop = _cell(row, idx_pop)
+            cover = _cell(row, idx_cover)
+            try:
+                popularity = None if pop is None else int(pop)
+            except (TypeError, ValueError):
+                popularity = None
+            songs.append(
+                Song(
+                    track_id=track_id,
+                    # Intern: artists (and some titles) repeat a lot, so share
+                    # one str object per distinct value instead of one per row.
+                    track_name=sys.intern(str(name)),
+                    track_artist=sys.intern(str(artist)),
+                    year=year,
+                    track_url=None if url is None else str(url),
+                    popularity=popularity,
+                    track_cover=None if cover is None else str(cover),
+                )
+            )
+    finally:
+        wb.close()
+
+    if not songs:
+        raise SystemExit("No valid songs found.")
+    return songs
+
+
+def _clean_songs_df(df: pd.DataFrame) -> pd.DataFrame:
+    """Normalize, validate and dedup a freshly parsed songs DataFrame."""
+    import pandas as pd
+
+    df.columns = [c.lower() for c in df.columns]
+    cols_set = set(df.columns)
+    missing = [c for c in REQUIRED_COLS if c not in cols_set]
+    if missing:
+        raise SystemExit(f"Dataset missing columns: {missing}. Required: {REQUIRED_COLS}")
+
+    keep_cols = REQUIRED_COLS + [c for c in OPTIONAL_COLS if c in cols_set]
+    df = df[keep_cols].copy()
+
+    df["year"] = pd.to_numeric(df["year"], errors="coerce").astype("Int64")
+    if "track_popularity" in df.columns:
+        df["track_popularity"] = pd.to_numeric(df["track_popularity"], errors="coerce").astype("Int64")
+
+    df = df.dropna(subset=["track_name", "track_artist", "year"])
+    df["year"] = df["year"].astype(int)
+    # Dedup on (track_id, year) happens during Song construction, where we're
+    # iterating anyway — no separate drop_duplicates pass.
+    return df.reset_index(drop=True)
+
+
+def _songs_from_clean_df(df: pd.DataFrame) -> List[Song]:
+    # Columnar extraction: one C-level copy per column plus a tight zip is far
+    # cheaper than per-row getattr/pd.isna through itertuples.
+    ids = df["track_id"].tolist()
+    names = df["track_name"].tolist()
+    artists = df["track_artist"].tolist()
+    years = df["year"].tolist()
+    urls = _column_or_none(df, "track_url")
+    pops = _column_or_none(df, "track_popularity")
+    covers = _column_or_none(df, "track_cover")
+
+    songs: List[Song] = []
+    seen: Set[tuple] = set()
+    for i, n, a, y, u, p, c in zip(ids, names, artists, years, urls, pops, covers):
+        if (i, y) in seen:
+            continue
+        seen.add((i, y))
+        songs.append(
+            Song(
+                track_id=sys.intern(i) if isinstance(i, str) else i,
+                track_name=sys.intern(str(n)),
+                track_artist=sys.intern(str(a)),
+                year=y,  # already plain int: the year column is cast before tolist()
+                track_url=None if u is None else str(u),
+                popularity=None if p is None else int(p),
+                track_cover=None if c is None else str(c),
+            )
+        )
+    if not songs:
+        raise SystemExit("No valid songs found.")
+    return songs
+
+
+def _load_cached_songs(path: str, cache_path: str) -> Optional[List[Song]]:
+    """Read the parquet sidecar if it's newer than the source file."""
+    try:
+        import pandas as pd
+
+        if not (os.path.exists(cache_path)
+                and os.path.getmtime(cache_path) >= os.path.getmtime(path)):
+            return None
+        df = pd.read_parquet(cache_path)
+        if df.empty or not set(REQUIRED_COLS).issubset(df.columns):
+            return None  # empty or foreign sidecar: treat as a cache miss
+        return _songs_from_clean_df(df)
+    except Exception:
+        return None  # no parquet engine or corrupt sidecar: re-parse the source
+
+
+def _write_song_cache(songs: List[Song], cache_path: str) -> None:
+    """Best-effort: persist the cleaned songs so the next launch skips parsing."""
+    try:
+        import pandas as pd
+
+        df = pd.DataFrame(
+            {
+                "track_id": [s.track_id for s in songs],
+                "track_name": [s.track_name for s in songs],
+                "track_artist": [s.track_artist for s in songs],
+                "year": [s.year for s in songs],
+                "track_url": [s.track_url for s in songs],
+                "track_popularity": pd.array([s.popularity for s in songs], dtype="Int64"),
+                "track_cover": [s.track_cover for s in songs],
+            }
+        )
+        df.to_parquet(cache_path, index=False)
+    except Exception:
+        pass  # pyarrow missing or directory read-only: caching is optional
+
+
+def _load_songs_csv(path: str) -> List[Song]:
+    return _songs_from_clean_df(_clean_songs_df(_read_csv(path)))
+
+
+_LOADERS = {".xlsx": _load_songs_xlsx, ".csv": _load_songs_csv}
+
+
+def load_songs(path: str) -> List[Song]:
+    # Fail fast on bad paths/extensions before any parser gets involved.
+    loader = _LOADERS.get(os.path.splitext(path)[1].lower())
+    if loader is None:
+        raise SystemExit("Unsupported file type. Use .xlsx or .csv")
+    if not os.path.exists(path):
+        raise SystemExit(f"File not found: {path}")
+
+    cache_path = path + ".parquet"
+    cached = _load_cached_songs(path, cache_path)
+    if cached is not None:
+        return cached
+
+    songs = loader(path)
+    _write_song_cache(songs, cache_path)
+    return songs
+
+
+def filter_popular(songs: List[Song], threshold: int = 75) -> List[Song]:
+    """Return only songs with track_popularity >= threshold (if present)."""
+    return [s for s in songs if s.popularity is not None and s.popularity >= threshold]
+
+
+# ---------------- Game mechanics ----------------
+RNG = random.Random()  # dedicated PRNG: auto-seeded once, seedable via --seed
+YEAR_KEY = attrgetter("year")  # C-level sort/insort key, cheaper than a lambda
+
+
+def build_deck(pool: List[Song]) -> List[Song]:
+    """Shuffled copy of the pool; drawing pops from the end in O(1)."""
+    deck = pool.copy()
+    RNG.shuffle(deck)
+    return deck
+
+
+def choose_next_song(deck: List[Song], used_ids: Set, used_years_mask: int) -> Optional[Song]:
+    """Pop the next unused song; used years are a bitmap indexed by year."""
+    while deck:
+        s = deck.pop()
+        if not (used_years_mask >> s.year) & 1 and s.track_id not in used_ids:
+            return s
+    return None
+
+
+def is_correct_insertion(timeline: List[Song], new_song: Song, insert_idx: int) -> bool:
+    """Check a placement against the (always year-sorted) timeline in O(1)."""
+    year = new_song.year
+    if insert_idx > 0 and timeline[insert_idx - 1].year >= year:
+        return False
+    if insert_idx < len(timeline) and timeline[insert_idx].year <= year:
+        return False
+    return True
+
+
+def render_timeline(timeline: List[Song]) -> None:
+    # One write instead of N+2 print calls: on unbuffered terminals every
+    # print is a separate flush, which dominates long-timeline renders.
+    buf = ["-" * 64, "🕓 Current timeline:"]
+    buf += [f"  {i}. {s.label(show_year=True)}" for i, s in enumerate(timeline, start=1)]
+    buf.append("-" * 64 + "\n")
+    sys.stdout.write("\n".join(buf) + "\n")